@@ -10,12 +10,209 @@ interaction patterns you'd see when using Claude Desktop with your crypto databa
 Run this after the main ingestion script to see AI-powered crypto analysis in action.
 """
 
+import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
+import io
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+import matplotlib
+matplotlib.use("Agg")  # Render straight to files; no interactive backend needed
 import matplotlib.pyplot as plt
 
+# (connect, read) timeouts in seconds for QuestDB HTTP calls
+_QUESTDB_TIMEOUT = (3.05, 30)
+
+# Keyword vocabulary for intent analysis, compiled once. Longer alternatives come
+# first so e.g. "24 hour" is consumed as a day range rather than as "hour".
+_INTENT_RE = re.compile(
+   r"(?P<price>price|cost|value)"
+   r"|(?P<volume>volume|trading|activity)"
+   r"|(?P<arbitrage>arbitrage|difference|spread|opportunity)"
+   r"|(?P<trend>trend|change|movement|performance)"
+   r"|(?P<comparison>compare|versus|between|vs)"
+   r"|(?P<pairs>all pairs|every pair|each pair|pairwise)"
+   r"|(?P<BTC>bitcoin|btc)"
+   r"|(?P<ETH>ethereum|eth)"
+   r"|(?P<ADA>cardano|ada)"
+   r"|(?P<SOL>solana|sol)"
+   r"|(?P<day>24 hour|today|day)"
+   r"|(?P<week>7 day|week)"
+   r"|(?P<hour>hour|recent)"
+)
+
+_INTENT_PRIORITY = (
+   ("price", "price_analysis"),
+   ("volume", "volume_analysis"),
+   ("arbitrage", "arbitrage_analysis"),
+   ("trend", "trend_analysis"),
+   ("comparison", "comparison"),
+)
+
+# Minimum cross-exchange spread (in %) reported as an arbitrage opportunity
+_ARBITRAGE_THRESHOLD_PCT = 1.0
+
+_SYMBOL_ORDER = ("BTC", "ETH", "ADA", "SOL")
+
+_TIME_RANGE_PRIORITY = (
+   ("hour", "1_hour"),
+   ("day", "1_day"),
+   ("week", "1_week"),
+)
+
+_TIME_FILTERS = {
+   "latest": "timestamp > dateadd('m', -15, now())",
+   "1_hour": "timestamp > dateadd('h', -1, now())",
+   "1_day": "timestamp > dateadd('d', -1, now())",
+   "1_week": "timestamp > dateadd('d', -7, now())"
+}
+
+# SQL templates, filled in with str.format from ClaudeCryptoAnalyst._sql_fragments
+_PRICE_LATEST_SQL = """
+SELECT
+    symbol,
+    exchange,
+    price,
+    timestamp
+FROM crypto_prices
+{symbol_where}
+LATEST ON timestamp PARTITION BY symbol, exchange
+ORDER BY symbol, exchange
+"""
+
+_PRICE_SAMPLE_SQL = """
+SELECT
+    symbol,
+    exchange,
+    price,
+    timestamp
+FROM crypto_prices
+WHERE {time_filter} {symbol_filter}
+ORDER BY timestamp DESC
+LIMIT 3
+"""
+
+_PRICE_SUMMARY_SQL = """
+SELECT
+    avg(price) as avg_price,
+    min(price) as min_price,
+    max(price) as max_price,
+    count(*) as record_count
+FROM crypto_prices
+WHERE {time_filter} {symbol_filter}
+"""
+
+_VOLUME_SQL = """
+SELECT
+    symbol,
+    exchange,
+    sum(volume) as total_volume,
+    avg(volume) as avg_volume,
+    count(*) as data_points
+FROM crypto_prices
+WHERE {time_filter} {symbol_filter}
+GROUP BY symbol, exchange
+ORDER BY total_volume DESC
+"""
+
+_ARBITRAGE_PAIRS_SQL = """
+WITH latest_by_exchange AS (
+    SELECT symbol, exchange, price
+    FROM crypto_prices
+    {symbol_where}
+    LATEST ON timestamp PARTITION BY symbol, exchange
+)
+SELECT
+    lp1.symbol,
+    lp1.exchange as exchange1,
+    lp1.price as price1,
+    lp2.exchange as exchange2,
+    lp2.price as price2,
+    abs(lp1.price - lp2.price) as price_diff,
+    (abs(lp1.price - lp2.price) / ((lp1.price + lp2.price) / 2) * 100) as arbitrage_pct
+FROM latest_by_exchange lp1
+JOIN latest_by_exchange lp2 ON lp1.symbol = lp2.symbol AND lp1.exchange < lp2.exchange
+WHERE abs(lp1.price - lp2.price) / ((lp1.price + lp2.price) / 2) * 100 > {arbitrage_threshold}
+ORDER BY arbitrage_pct DESC
+LIMIT 10
+"""
+
+# One grouped pass per symbol instead of joining every exchange pair; exchanges tied
+# on the low or high price collapse to one row per symbol (first() picks the name)
+_ARBITRAGE_BEST_PAIR_SQL = """
+WITH latest_by_exchange AS (
+    SELECT symbol, exchange, price
+    FROM crypto_prices
+    {symbol_where}
+    LATEST ON timestamp PARTITION BY symbol, exchange
+),
+spreads AS (
+    SELECT
+        symbol,
+        min(price) as low_price,
+        max(price) as high_price,
+        (max(price) - min(price)) / ((max(price) + min(price)) / 2) * 100 as arbitrage_pct
+    FROM latest_by_exchange
+    GROUP BY symbol
+),
+opportunities AS (
+    SELECT * FROM spreads
+    WHERE arbitrage_pct > {arbitrage_threshold}
+)
+SELECT
+    o.symbol,
+    first(lo.exchange) as exchange1,
+    o.low_price as price1,
+    first(hi.exchange) as exchange2,
+    o.high_price as price2,
+    o.high_price - o.low_price as price_diff,
+    o.arbitrage_pct
+FROM opportunities o
+JOIN latest_by_exchange lo ON lo.symbol = o.symbol AND lo.price = o.low_price
+JOIN latest_by_exchange hi ON hi.symbol = o.symbol AND hi.price = o.high_price
+ORDER BY arbitrage_pct DESC
+LIMIT 10
+"""
+
+_TREND_SQL = """
+SELECT
+    symbol,
+    exchange,
+    first(price) as earliest_price,
+    last(price) as latest_price,
+    (last(price) - first(price)) / first(price) * 100 as price_change_pct,
+    min(price) as min_price,
+    max(price) as max_price,
+    count(*) as data_points
+FROM crypto_prices
+WHERE {time_filter} {symbol_filter}
+GROUP BY symbol, exchange
+ORDER BY price_change_pct DESC
+"""
+
+# Default query; only the displayed sample is fetched, totals come from the summary
+_DEFAULT_SQL = """
+SELECT symbol, exchange, price, volume, timestamp
+FROM crypto_prices
+WHERE {time_filter} {symbol_filter}
+ORDER BY timestamp DESC
+LIMIT 3
+"""
+
+# Intents answered by a single grouped or filtered query (no summary twin needed)
+_INTENT_SQL = {
+   "volume_analysis": _VOLUME_SQL,
+   "arbitrage_analysis": _ARBITRAGE_PAIRS_SQL,
+   "arbitrage_best_pair": _ARBITRAGE_BEST_PAIR_SQL,
+   "trend_analysis": _TREND_SQL
+}
+
 class ClaudeCryptoAnalyst:
    """
    Simulates Claude Desktop's interaction with QuestDB crypto data
@@ -23,19 +220,32 @@ class ClaudeCryptoAnalyst:
 
    def __init__(self, questdb_host: str = "localhost", questdb_port: int = 9000):
        self.questdb_url = f"http://{questdb_host}:{questdb_port}"
+       # Keep-alive connections shared by every query (and by concurrent questions)
+       self.session = requests.Session()
+       adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+       self.session.mount("http://", adapter)
+       self.session.mount("https://", adapter)
+       # Chart figure, created on first render and reused afterwards
+       self._fig = None
+       self._ax = None
 
    def ask_claude(self, user_question: str) -> str:
        """
        Simulates asking Claude Desktop a natural language question about crypto data
-       """
-       print(f"\n🤖 Claude Desktop Processing: '{user_question}'")
-       print("🧠 Thinking... translating to SQL and executing...")
 
+       Prints nothing itself, so questions can be answered on worker threads; the
+       caller prints the transcript in order.
+       """
        # This simulates Claude's thought process
        query_analysis = self._analyze_user_intent(user_question)
        sql_query = self._generate_sql(query_analysis)
        results = self._execute_questdb_query(sql_query)
-       response = self._format_human_response(results, user_question)
+
+       # Let QuestDB reduce the rows instead of shipping them all to Python
+       summary_sql = self._generate_summary_sql(query_analysis)
+       summary = self._execute_questdb_query(summary_sql) if summary_sql else None
+
+       response = self._format_human_response(results, user_question, summary)
 
        return response
 
@@ -53,236 +263,226 @@ class ClaudeCryptoAnalyst:
            "comparison": False
        }
 
+       # Single sweep over the question; each match is dispatched on its group name
+       matched = {m.lastgroup for m in _INTENT_RE.finditer(question_lower)}
+
        # Intent classification
-       if any(word in question_lower for word in ["price", "cost", "value"]):
-           analysis["intent"] = "price_analysis"
-       elif any(word in question_lower for word in ["volume", "trading", "activity"]):
-           analysis["intent"] = "volume_analysis"
-       elif any(word in question_lower for word in ["arbitrage", "difference", "spread", "opportunity"]):
-           analysis["intent"] = "arbitrage_analysis"
-       elif any(word in question_lower for word in ["trend", "change", "movement", "performance"]):
-           analysis["intent"] = "trend_analysis"
-       elif any(word in question_lower for word in ["compare", "vs", "versus", "between"]):
-           analysis["intent"] = "comparison"
-           analysis["comparison"] = True
+       for group, intent in _INTENT_PRIORITY:
+           if group in matched:
+               analysis["intent"] = intent
+               analysis["comparison"] = intent == "comparison"
+               break
+
+       # The best pair per symbol answers the common question; listing every pair is opt-in
+       if analysis["intent"] == "arbitrage_analysis" and "pairs" not in matched:
+           analysis["intent"] = "arbitrage_best_pair"
 
        # Extract crypto symbols
-       crypto_symbols = ["btc", "bitcoin", "eth", "ethereum", "ada", "cardano", "sol", "solana"]
-       for symbol in crypto_symbols:
-           if symbol in question_lower:
-               if symbol in ["btc", "bitcoin"]:
-                   analysis["entities"].append("BTC")
-               elif symbol in ["eth", "ethereum"]:
-                   analysis["entities"].append("ETH")
-               elif symbol in ["ada", "cardano"]:
-                   analysis["entities"].append("ADA")
-               elif symbol in ["sol", "solana"]:
-                   analysis["entities"].append("SOL")
+       analysis["entities"] = [symbol for symbol in _SYMBOL_ORDER if symbol in matched]
 
        # Extract time ranges
-       if any(word in question_lower for word in ["hour", "last hour", "recent"]):
-           analysis["time_range"] = "1_hour"
-       elif any(word in question_lower for word in ["day", "today", "24 hour"]):
-           analysis["time_range"] = "1_day"
-       elif any(word in question_lower for word in ["week", "7 day"]):
-           analysis["time_range"] = "1_week"
+       for group, time_range in _TIME_RANGE_PRIORITY:
+           if group in matched:
+               analysis["time_range"] = time_range
+               break
 
        return analysis
 
-   def _generate_sql(self, analysis: Dict) -> str:
+   @staticmethod
+   def _sql_signature(analysis: Dict) -> Tuple:
        """
-       Simulates Claude generating SQL based on intent analysis
+       Canonicalize an intent analysis into a hashable key for the SQL caches
        """
-       time_conditions = {
-           "latest": "timestamp > dateadd('m', -15, now())",
-           "1_hour": "timestamp > dateadd('h', -1, now())",
-           "1_day": "timestamp > dateadd('d', -1, now())",
-           "1_week": "timestamp > dateadd('d', -7, now())"
-       }
-
-       time_filter = time_conditions.get(analysis["time_range"], time_conditions["latest"])
-
-       # Symbol filter
-       symbol_filter = ""
-       if analysis["entities"]:
-           symbols = "', '".join(analysis["entities"])
-           symbol_filter = f" AND symbol IN ('{symbols}')"
+       return (
+           analysis["intent"],
+           tuple(sorted(set(analysis["entities"]))),
+           analysis["time_range"],
+           analysis["comparison"]
+       )
 
-       if analysis["intent"] == "price_analysis":
-           if analysis["comparison"]:
-               # Build WHERE clause for LATEST ON queries
-               where_clause = ""
-               if analysis["entities"]:
-                   symbols = "', '".join(analysis["entities"])
-                   where_clause = f"WHERE symbol IN ('{symbols}')"
+   @staticmethod
+   def _sql_fragments(entities: Tuple[str, ...], time_range: str) -> Dict[str, str]:
+       """
+       Build the filter fragments substituted into the SQL templates
+       """
+       # Symbol filter, built once and reused in each placement the templates need
+       symbol_filter = symbol_where = ""
+       if entities:
+           symbols = "', '".join(entities)
+           symbol_in = f"symbol IN ('{symbols}')"
+           symbol_filter = f" AND {symbol_in}"
+           symbol_where = f"WHERE {symbol_in}"
+
+       return {
+           "time_filter": _TIME_FILTERS.get(time_range, _TIME_FILTERS["latest"]),
+           "symbol_filter": symbol_filter,
+           "symbol_where": symbol_where,
+           "arbitrage_threshold": _ARBITRAGE_THRESHOLD_PCT
+       }
 
-               return f"""
-               SELECT
-                   symbol,
-                   exchange,
-                   price,
-                   timestamp
-               FROM crypto_prices
-               LATEST ON timestamp PARTITION BY symbol, exchange
-               {where_clause}
-               ORDER BY symbol, exchange
-               """
-           else:
-               return f"""
-               SELECT
-                   symbol,
-                   exchange,
-                   price,
-                   timestamp
-               FROM crypto_prices
-               WHERE {time_filter} {symbol_filter}
-               ORDER BY timestamp DESC
-               LIMIT 20
-               """
+   def _generate_sql(self, analysis: Dict) -> str:
+       """
+       Simulates Claude generating SQL based on intent analysis
+       """
+       return self._generate_sql_cached(*self._sql_signature(analysis))
 
-       elif analysis["intent"] == "volume_analysis":
-           return f"""
-           SELECT
-               symbol,
-               exchange,
-               sum(volume) as total_volume,
-               avg(volume) as avg_volume,
-               count(*) as data_points
-           FROM crypto_prices
-           WHERE {time_filter} {symbol_filter}
-           GROUP BY symbol, exchange
-           ORDER BY total_volume DESC
-           """
+   @classmethod
+   @lru_cache(maxsize=128)
+   def _generate_sql_cached(cls, intent: str, entities: Tuple[str, ...],
+                            time_range: str, comparison: bool) -> str:
+       """
+       Build the SQL for an intent signature; repeated questions reuse the cached string
+       """
+       if intent == "price_analysis":
+           template = _PRICE_LATEST_SQL if comparison else _PRICE_SAMPLE_SQL
+       else:
+           template = _INTENT_SQL.get(intent, _DEFAULT_SQL)
 
-       elif analysis["intent"] == "arbitrage_analysis":
-           # Build the symbol filter for the outer query instead
-           symbol_where = ""
-           if analysis["entities"]:
-               symbols = "', '".join(analysis["entities"])
-               symbol_where = f"WHERE lp1.symbol IN ('{symbols}')"
+       return template.format(**cls._sql_fragments(entities, time_range))
 
-           return f"""
-           WITH latest_by_exchange AS (
-               SELECT symbol, exchange, price
-               FROM crypto_prices
-               LATEST ON timestamp PARTITION BY symbol, exchange
-           )
-           SELECT
-               lp1.symbol,
-               lp1.exchange as exchange1,
-               lp1.price as price1,
-               lp2.exchange as exchange2,
-               lp2.price as price2,
-               abs(lp1.price - lp2.price) as price_diff,
-               (abs(lp1.price - lp2.price) / ((lp1.price + lp2.price) / 2) * 100) as arbitrage_pct
-           FROM latest_by_exchange lp1
-           JOIN latest_by_exchange lp2 ON lp1.symbol = lp2.symbol AND lp1.exchange < lp2.exchange
-           {symbol_where}
-           AND abs(lp1.price - lp2.price) / ((lp1.price + lp2.price) / 2) * 100 > 0.1
-           ORDER BY arbitrage_pct DESC
-           """
+   def _generate_summary_sql(self, analysis: Dict) -> Optional[str]:
+       """
+       Generate an aggregate-only twin query so price statistics are computed by QuestDB
+       """
+       return self._generate_summary_sql_cached(*self._sql_signature(analysis))
 
-       elif analysis["intent"] == "trend_analysis":
-           return f"""
-           SELECT
-               symbol,
-               exchange,
-               first(price) as earliest_price,
-               last(price) as latest_price,
-               (last(price) - first(price)) / first(price) * 100 as price_change_pct,
-               min(price) as min_price,
-               max(price) as max_price,
-               count(*) as data_points
-           FROM crypto_prices
-           WHERE {time_filter} {symbol_filter}
-           GROUP BY symbol, exchange
-           ORDER BY price_change_pct DESC
-           """
+   @classmethod
+   @lru_cache(maxsize=128)
+   def _generate_summary_sql_cached(cls, intent: str, entities: Tuple[str, ...],
+                                    time_range: str, comparison: bool) -> Optional[str]:
+       """
+       Build the summary SQL for an intent signature, cached like the main query
+       """
+       # Grouped and arbitrage answers are already small; raw-row answers only fetch a sample
+       if intent in _INTENT_SQL:
+           return None
+       if intent == "price_analysis" and comparison:
+           return None
 
-       else:
-           # Default query
-           return f"""
-           SELECT symbol, exchange, price, volume, timestamp
-           FROM crypto_prices
-           WHERE {time_filter} {symbol_filter}
-           ORDER BY timestamp DESC
-           LIMIT 10
-           """
+       return _PRICE_SUMMARY_SQL.format(**cls._sql_fragments(entities, time_range))
 
    def _execute_questdb_query(self, sql_query: str) -> Dict:
        """
        Execute the SQL query against QuestDB
        """
        try:
-           response = requests.get(
+           response = self.session.get(
                f"{self.questdb_url}/exec",
-               params={"query": sql_query}
+               params={"query": sql_query, "count": "false"},
+               timeout=_QUESTDB_TIMEOUT
            )
            response.raise_for_status()
-           return response.json()
+           return orjson.loads(response.content)
        except Exception as e:
            return {"error": str(e)}
 
-   def _format_human_response(self, results: Dict, original_question: str) -> str:
+   def _execute_questdb_query_df(self, sql_query: str, dtype: Optional[Dict] = None,
+                                 parse_dates: Optional[List[str]] = None) -> pd.DataFrame:
+       """
+       Execute the SQL query via QuestDB's CSV export and parse it directly into a DataFrame
+       """
+       response = self.session.get(
+           f"{self.questdb_url}/exp",
+           params={"query": sql_query},
+           timeout=_QUESTDB_TIMEOUT
+       )
+       response.raise_for_status()
+       return pd.read_csv(
+           io.StringIO(response.text),
+           dtype=dtype,
+           parse_dates=parse_dates,
+           date_format="ISO8601"
+       )
+
+   def _format_human_response(self, results: Dict, original_question: str,
+                              summary: Optional[Dict] = None) -> str:
        """
        Simulates Claude formatting the results into a human-readable response
        """
+       return "\n".join(self._iter_response_lines(results, original_question, summary))
+
+   def _iter_response_lines(self, results: Dict, original_question: str,
+                            summary: Optional[Dict] = None) -> Iterator[str]:
+       """
+       Yield the response line by line; the caller owns the newline joining
+       """
        if "error" in results:
-           return f"❌ I encountered an error while analyzing your crypto data: {results['error']}"
+           yield f"❌ I encountered an error while analyzing your crypto data: {results['error']}"
+           return
 
        if not results.get("dataset") or len(results["dataset"]) == 0:
-           return "📊 I couldn't find any matching crypto data for your query. The database might be empty or the time range might be too restrictive."
+           # Arbitrage rows are filtered server-side, so an empty result is an answer
+           if any(col["name"] == "arbitrage_pct" for col in results.get("columns", [])):
+               yield f"🎯 No significant arbitrage opportunities found (>{_ARBITRAGE_THRESHOLD_PCT:g}%)"
+           else:
+               yield "📊 I couldn't find any matching crypto data for your query. The database might be empty or the time range might be too restrictive."
+           return
 
        data = results["dataset"]
        columns = [col["name"] for col in results.get("columns", [])]
+       idx = {col: i for i, col in enumerate(columns)}
+
+       # Aggregates computed server-side, when a summary query was issued
+       stats = None
+       if summary and "error" not in summary and summary.get("dataset"):
+           summary_columns = [col["name"] for col in summary.get("columns", [])]
+           stats = dict(zip(summary_columns, summary["dataset"][0]))
+       total_records = stats["record_count"] if stats else len(data)
 
        # Format response based on data content
-       response_parts = []
-       response_parts.append(f"📈 Based on your question '{original_question}', here's what I found:")
-       response_parts.append(f"\n🔍 Found {len(data)} records with {len(columns)} data points each.")
+       yield f"📈 Based on your question '{original_question}', here's what I found:"
+       yield ""
+       yield f"🔍 Found {total_records} records with {len(columns)} data points each."
 
        # Analyze the results and provide insights
-       if "price" in columns:
-           prices = [row[columns.index("price")] for row in data if row[columns.index("price")] is not None]
-           if prices:
-               avg_price = sum(prices) / len(prices)
-               min_price = min(prices)
-               max_price = max(prices)
-               response_parts.append(f"\n💰 Price Analysis:")
-               response_parts.append(f"   • Average Price: ${avg_price:,.2f}")
-               response_parts.append(f"   • Price Range: ${min_price:,.2f} - ${max_price:,.2f}")
-
-       if "arbitrage_pct" in columns:
-           arb_opportunities = [row for row in data if row[columns.index("arbitrage_pct")] > 1.0]
-           response_parts.append(f"\n🎯 Arbitrage Opportunities:")
-           if arb_opportunities:
-               response_parts.append(f"   • Found {len(arb_opportunities)} opportunities > 1%")
-               for i, opp in enumerate(arb_opportunities[:3]):
-                   symbol_idx = columns.index("symbol")
-                   ex1_idx = columns.index("exchange1")
-                   ex2_idx = columns.index("exchange2")
-                   arb_idx = columns.index("arbitrage_pct")
-                   response_parts.append(f"   • {opp[symbol_idx]}: {opp[arb_idx]:.2f}% between {opp[ex1_idx]} and {opp[ex2_idx]}")
-           else:
-               response_parts.append("   • No significant arbitrage opportunities found (>1%)")
-
-       if "total_volume" in columns:
-           volumes = [row[columns.index("total_volume")] for row in data]
-           total_volume = sum(volumes)
-           response_parts.append(f"\n📊 Volume Analysis:")
-           response_parts.append(f"   • Total Volume: {total_volume:,.2f}")
-           response_parts.append(f"   • Average per Exchange: {total_volume/len(volumes):,.2f}")
+       price_stats = None
+       if stats and stats["avg_price"] is not None:
+           price_stats = (stats["avg_price"], stats["min_price"], stats["max_price"])
+       elif "price" in idx:
+           price_idx = idx["price"]
+           prices = np.fromiter(
+               (row[price_idx] for row in data if row[price_idx] is not None),
+               dtype=np.float64
+           )
+           if prices.size:
+               # Reductions run in NumPy's compiled loops rather than the interpreter
+               price_stats = (prices.mean(), prices.min(), prices.max())
+
+       if price_stats:
+           avg_price, min_price, max_price = (f"${value:,.2f}" for value in price_stats)
+           yield ""
+           yield "💰 Price Analysis:"
+           yield f"   • Average Price: {avg_price}"
+           yield f"   • Price Range: {min_price} - {max_price}"
+
+       if "arbitrage_pct" in idx:
+           symbol_idx = idx["symbol"]
+           ex1_idx = idx["exchange1"]
+           ex2_idx = idx["exchange2"]
+           arb_idx = idx["arbitrage_pct"]
+           yield ""
+           yield "🎯 Arbitrage Opportunities:"
+           yield f"   • Showing top {len(data)} opportunities > {_ARBITRAGE_THRESHOLD_PCT:g}%"
+           for opp in data[:3]:
+               yield f"   • {opp[symbol_idx]}: {opp[arb_idx]:.2f}% between {opp[ex1_idx]} and {opp[ex2_idx]}"
+
+       if "total_volume" in idx:
+           volume_idx = idx["total_volume"]
+           total_volume = sum(row[volume_idx] for row in data)
+           yield ""
+           yield "📊 Volume Analysis:"
+           yield f"   • Total Volume: {total_volume:,.2f}"
+           yield f"   • Average per Exchange: {total_volume / len(data):,.2f}"
 
        # Show sample data
-       response_parts.append(f"\n📋 Sample Data:")
+       yield ""
+       yield "📋 Sample Data:"
        for i, row in enumerate(data[:3]):
-           row_str = " | ".join([f"{col}: {val}" for col, val in zip(columns, row)])
-           response_parts.append(f"   {i+1}. {row_str}")
+           row_str = " | ".join(f"{col}: {val}" for col, val in zip(columns, row))
+           yield f"   {i+1}. {row_str}"
 
-       if len(data) > 3:
-           response_parts.append(f"   ... and {len(data) - 3} more records")
-
-       return "\n".join(response_parts)
+       if total_records > 3:
+           yield f"   ... and {total_records - 3} more records"
 
    def create_visualization(self, question: str) -> str:
        """
@@ -299,51 +499,59 @@ class ClaudeCryptoAnalyst:
            timestamp
        FROM crypto_prices
        WHERE timestamp > dateadd('h', -6, now())
-       ORDER BY timestamp
+       ORDER BY symbol, exchange, timestamp
        """
 
        try:
-           response = requests.get(f"{self.questdb_url}/exec", params={"query": query})
-           data = response.json()
+           # Fetch as CSV straight into a DataFrame for easy plotting
+           df = self._execute_questdb_query_df(
+               query,
+               dtype={'price': 'float64'},
+               parse_dates=['timestamp']
+           )
 
-           if not data.get("dataset"):
+           if df.empty:
                return "❌ No data available for visualization"
 
-           # Convert to DataFrame for easy plotting
-           df = pd.DataFrame(data["dataset"], columns=[col["name"] for col in data["columns"]])
-           df['timestamp'] = pd.to_datetime(df['timestamp'])
-
-           # Create a simple price chart
-           plt.figure(figsize=(12, 6))
-
-           for symbol in df['symbol'].unique():
-               for exchange in df['exchange'].unique():
-                   subset = df[(df['symbol'] == symbol) & (df['exchange'] == exchange)]
-                   if not subset.empty:
-                       plt.plot(subset['timestamp'], subset['price'],
-                               marker='o', label=f"{symbol} ({exchange})", linewidth=2)
-
-           plt.title("Crypto Prices Over Time", fontsize=16, fontweight='bold')
-           plt.xlabel("Time")
-           plt.ylabel("Price (USD)")
-           plt.legend()
-           plt.grid(True, alpha=0.3)
-           plt.xticks(rotation=45)
-           plt.tight_layout()
-
-           # Save the plot
+           # Create a simple price chart, reusing the figure from earlier renders
+           if self._fig is None:
+               self._fig, self._ax = plt.subplots(figsize=(12, 6))
+           fig, ax = self._fig, self._ax
+           ax.clear()
+
+           # Rows arrive grouped by symbol/exchange, so each series is a contiguous
+           # run; split the column arrays at the run boundaries into views
+           symbols = df['symbol'].to_numpy()
+           exchanges = df['exchange'].to_numpy()
+           starts = np.flatnonzero((symbols[1:] != symbols[:-1]) | (exchanges[1:] != exchanges[:-1])) + 1
+           timestamps = np.split(df['timestamp'].to_numpy(dtype='datetime64[ns]'), starts)
+           prices = np.split(df['price'].to_numpy(), starts)
+
+           for start, ts, px in zip(np.concatenate(([0], starts)), timestamps, prices):
+               ax.plot(ts, px, marker='o', label=f"{symbols[start]} ({exchanges[start]})", linewidth=2)
+
+           ax.set_title("Crypto Prices Over Time", fontsize=16, fontweight='bold')
+           ax.set_xlabel("Time")
+           ax.set_ylabel("Price (USD)")
+           ax.legend()
+           ax.grid(True, alpha=0.3)
+           ax.tick_params(axis='x', labelrotation=45)
+           fig.tight_layout()
+
+           # Save the plot at screen resolution
            filename = f"crypto_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-           plt.savefig(filename, dpi=300, bbox_inches='tight')
-           plt.close()
+           fig.savefig(filename, dpi=100, bbox_inches='tight')
 
            return f"📈 Visualization saved as {filename}"
 
        except Exception as e:
            return f"❌ Failed to create visualization: {e}"
 
-def demonstrate_crypto_ai_interaction():
+def demonstrate_crypto_ai_interaction(demo_delay: float = 0):
    """
    Demonstrate natural language interaction with crypto data
+
+   ``demo_delay`` is the number of seconds to pause between answers; 0 disables the pause.
    """
    print("🤖 Claude Desktop Crypto Analysis Demo")
    print("=" * 50)
@@ -365,18 +573,21 @@ def demonstrate_crypto_ai_interaction():
    print("\n🎯 Simulating natural language crypto analysis...")
    print("(This is what you'd see when using Claude Desktop with your QuestDB crypto data)")
 
-   for question in user_questions:
+   # Get Claude's responses; questions are independent, so overlap their QuestDB round-trips
+   with ThreadPoolExecutor(max_workers=len(user_questions)) as executor:
+       responses = list(executor.map(claude.ask_claude, user_questions))
+
+   for question, response in zip(user_questions, responses):
        print("\n" + "="*80)
        print(f"👤 User: {question}")
-
-       # Get Claude's response
-       response = claude.ask_claude(question)
+       print(f"\n🤖 Claude Desktop Processing: '{question}'")
+       print("🧠 Thinking... translating to SQL and executing...")
        print(f"\n🤖 Claude Desktop Response:")
        print(response)
 
-       # Add a small delay to simulate thinking time
-       import time
-       time.sleep(1)
+       # Optional delay to simulate thinking time
+       if demo_delay:
+           time.sleep(demo_delay)
 
    # Demonstrate visualization capability
    print("\n" + "="*80)
@@ -430,18 +641,20 @@ def simulate_advanced_crypto_scenarios():
            "scenario": "High Frequency Trading Analysis",
            "question": "Show me price volatility by 5-minute intervals",
            "sql_override": """
-           SELECT
-               symbol,
-               exchange,
-               date_trunc('minute', timestamp) as time_bucket,
-               min(price) as low,
-               max(price) as high,
-               first(price) as open,
-               last(price) as close,
-               (max(price) - min(price)) / avg(price) * 100 as volatility_pct
-           FROM crypto_prices
-           WHERE timestamp > dateadd('h', -2, now())
-           GROUP BY symbol, exchange, date_trunc('minute', timestamp)
+           SELECT * FROM (
+               SELECT
+                   symbol,
+                   exchange,
+                   timestamp as time_bucket,
+                   min(price) as low,
+                   max(price) as high,
+                   first(price) as open,
+                   last(price) as close,
+                   (max(price) - min(price)) / avg(price) * 100 as volatility_pct
+               FROM crypto_prices
+               WHERE timestamp > dateadd('h', -2, now())
+               SAMPLE BY 5m ALIGN TO CALENDAR
+           )
            ORDER BY time_bucket DESC
            LIMIT 50
            """
@@ -476,38 +689,43 @@ def simulate_advanced_crypto_scenarios():
 
        # Execute custom SQL for advanced scenarios
        try:
-           response = requests.get(
+           response = claude.session.get(
                f"{claude.questdb_url}/exec",
-               params={"query": scenario['sql_override']}
+               params={"query": scenario['sql_override']},
+               timeout=_QUESTDB_TIMEOUT
            )
-           results = response.json()
+           results = orjson.loads(response.content)
 
            if results.get("dataset"):
                print(f"✅ Found {len(results['dataset'])} results")
+               idx = {col["name"]: i for i, col in enumerate(results.get("columns", []))}
 
                # Show insights based on scenario
                if scenario['scenario'] == "Flash Crash Detection":
                    crashes = results['dataset']
                    if crashes:
                        print("🚨 FLASH CRASHES DETECTED:")
+                       symbol_idx, exchange_idx, change_idx = idx["symbol"], idx["exchange"], idx["change_pct"]
                        for crash in crashes[:3]:
-                           print(f"   • {crash[0]} on {crash[1]}: {crash[4]:.2f}% drop")
+                           print(f"   • {crash[symbol_idx]} on {crash[exchange_idx]}: {crash[change_idx]:.2f}% drop")
                    else:
                        print("✅ No significant crashes detected")
 
                elif scenario['scenario'] == "High Frequency Trading Analysis":
                    volatility_data = results['dataset']
                    if volatility_data:
-                       avg_vol = sum(row[7] for row in volatility_data if row[7]) / len(volatility_data)
+                       vol_idx = idx["volatility_pct"]
+                       avg_vol = sum(row[vol_idx] for row in volatility_data if row[vol_idx]) / len(volatility_data)
                        print(f"📊 Average 5-min volatility: {avg_vol:.2f}%")
-                       high_vol = [row for row in volatility_data if row[7] and row[7] > 2.0]
+                       high_vol = [row for row in volatility_data if row[vol_idx] and row[vol_idx] > 2.0]
                        print(f"⚡ High volatility periods (>2%): {len(high_vol)}")
 
                elif scenario['scenario'] == "Liquidity Analysis":
                    liquidity_data = results['dataset']
                    if liquidity_data:
-                       best_exchange = min(liquidity_data, key=lambda x: x[3])
-                       print(f"🏆 Tightest spreads: {best_exchange[0]} ({best_exchange[3]:.3f}%)")
+                       exchange_idx, spread_pct_idx = idx["exchange"], idx["avg_spread_pct"]
+                       best_exchange = min(liquidity_data, key=lambda x: x[spread_pct_idx])
+                       print(f"🏆 Tightest spreads: {best_exchange[exchange_idx]} ({best_exchange[spread_pct_idx]:.3f}%)")
                        print(f"📈 Total exchange-symbol pairs analyzed: {len(liquidity_data)}")
            else:
                print("⚠️ No data found for this analysis")
@@ -526,19 +744,14 @@ def create_crypto_dashboard_export():
 
    dashboard_queries = {
        "price_summary": """
-       WITH latest_prices AS (
-           SELECT symbol, exchange, price, volume, timestamp,
-                  ROW_NUMBER() OVER (PARTITION BY symbol, exchange ORDER BY timestamp DESC) as rn
-           FROM crypto_prices
-       )
        SELECT
            symbol,
            exchange,
            price,
            volume,
            timestamp
-       FROM latest_prices
-       WHERE rn = 1
+       FROM crypto_prices
+       LATEST ON timestamp PARTITION BY symbol, exchange
        ORDER BY symbol, exchange
        """,
 
@@ -575,31 +788,41 @@ def create_crypto_dashboard_export():
        print(f"\n📋 Exporting {dashboard_name.replace('_', ' ').title()}...")
 
        try:
-           # Get CSV format for dashboard consumption
-           response = requests.get(
+           # Get CSV format for dashboard consumption, streamed straight to disk
+           with claude.session.get(
                f"{claude.questdb_url}/exp",
-               params={"query": query}
-           )
-
-           if response.status_code == 200:
-               csv_data = response.text
-               filename = f"crypto_{dashboard_name}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
-
-               with open(filename, 'w') as f:
-                   f.write(csv_data)
-
-               lines = len(csv_data.split('\n')) - 1  # Subtract header
-               print(f"✅ Exported {lines} records to {filename}")
-
-               # Show preview
-               preview_lines = csv_data.split('\n')[:4]  # Header + 3 data rows
-               print("🔍 Preview:")
-               for line in preview_lines:
-                   if line.strip():
-                       print(f"   {line}")
-
-           else:
-               print(f"❌ Export failed for {dashboard_name}")
+               params={"query": query},
+               stream=True,
+               timeout=_QUESTDB_TIMEOUT
+           ) as response:
+               if response.status_code == 200:
+                   filename = f"crypto_{dashboard_name}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+
+                   newlines = 0
+                   last_chunk = b""
+                   with open(filename, 'wb') as f:
+                       for chunk in response.iter_content(chunk_size=65536):
+                           f.write(chunk)
+                           newlines += chunk.count(b'\n')
+                           last_chunk = chunk
+
+                   # Count an unterminated final line, then subtract the header
+                   if last_chunk and not last_chunk.endswith(b'\n'):
+                       newlines += 1
+                   lines = max(newlines - 1, 0)
+                   print(f"✅ Exported {lines} records to {filename}")
+
+                   # Show preview from the head of the written file
+                   with open(filename, 'rb') as f:
+                       head = f.read(4096).decode('utf-8', errors='replace')
+                   preview_lines = head.split('\n')[:4]  # Header + 3 data rows
+                   print("🔍 Preview:")
+                   for line in preview_lines:
+                       if line.strip():
+                           print(f"   {line}")
+
+               else:
+                   print(f"❌ Export failed for {dashboard_name}")
 
        except Exception as e:
            print(f"❌ Export error: {e}")
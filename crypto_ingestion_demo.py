@@ -1,27 +1,240 @@
 #!/usr/bin/env python3
 
+import asyncio
+import aiohttp
+import random
 import requests
-from datetime import datetime
-from typing import Dict, List
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set, Tuple
 import logging
+import orjson
+import pandas as pd
+from questdb.ingress import Sender
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Retry policy shared by the QuestDB session and the exchange client
+_RETRY_TOTAL = 3
+_RETRY_BACKOFF_FACTOR = 1.0
+_RETRY_BACKOFF_JITTER = 0.5
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Per-exchange request budget (requests/second, also the burst size); a 429
+# halves the live rate, which then creeps back after a run of successes
+_EXCHANGE_RATE_LIMITS = {
+   'binance': 20.0,
+   'coinbase': 10.0,
+   'kraken': 15.0,
+   'coingecko': 5.0
+}
+_RATE_MIN = 0.5
+_RATE_DECREASE_FACTOR = 0.5
+_RATE_RECOVERY_SUCCESSES = 10
+
+# Binance record fields and the ones only the order book endpoint provides
+_BINANCE_FIELDS = frozenset({'price', 'volume', 'bid', 'ask', 'spread'})
+_BINANCE_DEPTH_FIELDS = frozenset({'bid', 'ask', 'spread'})
+
+# crypto_prices columns, in table order, and the DOUBLE ones among them
+_ROW_COLUMNS = ['timestamp', 'symbol', 'exchange', 'price', 'volume', 'bid', 'ask', 'spread', 'market_cap']
+_DOUBLE_COLUMNS = ['price', 'volume', 'bid', 'ask', 'spread', 'market_cap']
+
+# Rows per ILP request when ingesting
+_INGEST_CHUNK_ROWS = 1000
+
+# Exchange REST endpoints
+_BINANCE_PING_URL = "https://api.binance.com/api/v3/ping"
+_BINANCE_PRICE_URL = "https://api.binance.com/api/v3/ticker/price"
+_BINANCE_TICKER_URL = "https://api.binance.com/api/v3/ticker/24hr"
+_BINANCE_DEPTH_URL = "https://api.binance.com/api/v3/depth"
+_COINBASE_TICKER_URL = "https://api.exchange.coinbase.com/products/{}-USD/ticker"
+_COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price"
+_KRAKEN_TICKER_URL = "https://api.kraken.com/0/public/Ticker"
+
+# Sent with every exchange request; the browser User-Agent avoids blocking
+_HEADERS = {
+   'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+   'Accept': 'application/json',
+   # Verbose JSON (Kraken, CoinGecko) compresses well; aiohttp decodes transparently
+   'Accept-Encoding': 'gzip, deflate'
+}
+
+# Exchange identifiers for our symbols (static reference data)
+_COINGECKO_IDS = {
+   'BTC': 'bitcoin',
+   'ETH': 'ethereum',
+   'ADA': 'cardano',
+   'SOL': 'solana'
+}
+_KRAKEN_PAIRS = {
+   'BTC': 'XXBTZUSD',
+   'ETH': 'XETHZUSD',
+   'ADA': 'ADAUSD',
+   'SOL': 'SOLUSD'
+}
+
+# Rapid re-ticks within this window reuse the last CoinGecko quote
+_COINGECKO_CACHE_TTL = 2.0
+
+class _AdaptiveRateLimiter:
+   """
+   Token bucket for one exchange whose refill rate adapts to the server:
+   multiplicative decrease on 429, additive increase after consecutive successes
+   """
+
+   def __init__(self, rate: float):
+       self.max_rate = rate
+       self.rate = rate
+       self._tokens = rate
+       self._updated = time.monotonic()
+       self._successes = 0
+
+   async def acquire(self):
+       """
+       Wait until a token is available and take it
+       """
+       while True:
+           now = time.monotonic()
+           self._tokens = min(self.max_rate, self._tokens + (now - self._updated) * self.rate)
+           self._updated = now
+           # No await between the check and the take, so this is atomic on the event loop
+           if self._tokens >= 1:
+               self._tokens -= 1
+               return
+           await asyncio.sleep((1 - self._tokens) / self.rate)
+
+   def on_throttled(self):
+       """
+       Server answered 429: halve the rate
+       """
+       self.rate = max(_RATE_MIN, self.rate * _RATE_DECREASE_FACTOR)
+       self._successes = 0
+       logger.warning("🐢 Rate limited, slowing down to %.2f req/s", self.rate)
+
+   def on_success(self):
+       """
+       Server accepted the request: recover 10% of the cap after enough in a row
+       """
+       self._successes += 1
+       if self._successes >= _RATE_RECOVERY_SUCCESSES and self.rate < self.max_rate:
+           self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+           self._successes = 0
+
 class QuestDBCryptoIngestion:
    """
-   Handles crypto data ingestion into QuestDB via REST API
+   Handles crypto data ingestion into QuestDB: schema via the REST API,
+   rows via the ILP sender
+
+   Exchange fetchers are async; use the instance as ``async with`` so the
+   shared aiohttp session is opened and closed around them (the ILP sender is
+   closed on exit too).
    """
 
    def __init__(self, questdb_host: str = "localhost", questdb_port: int = 9000):
        self.questdb_url = f"http://{questdb_host}:{questdb_port}"
+       # Bulk writes go over ILP on the same HTTP port
+       self.ilp_conf = f"http::addr={questdb_host}:{questdb_port};"
+       # Opened on first ingest and kept for later batches (see _ilp_sender)
+       self._sender: Optional[Sender] = None
        self.session = requests.Session()
+       # Survive transient QuestDB hiccups instead of failing the whole run
+       retry = Retry(
+           total=_RETRY_TOTAL,
+           backoff_factor=_RETRY_BACKOFF_FACTOR,
+           backoff_jitter=_RETRY_BACKOFF_JITTER,
+           status_forcelist=_RETRY_STATUSES,
+           respect_retry_after_header=True
+       )
+       adapter = HTTPAdapter(max_retries=retry)
+       self.session.mount("http://", adapter)
+       self.session.mount("https://", adapter)
+       # Set once the schema exists, so repeated pipeline runs skip the DDL round trip
+       self._table_ready = False
+       # Exchange HTTP client, opened in __aenter__ (aiohttp needs a running loop)
+       self.http: Optional[aiohttp.ClientSession] = None
+       # CoinGecko simple/price responses keyed by ids: (monotonic fetch time, payload)
+       self._coingecko_cache: Dict[str, Tuple[float, Dict]] = {}
+       # Binance geo-blocks (451) every endpoint alike: probe once, then stop asking
+       self._binance_probed = False
+       self._binance_blocked = False
+       # Client-side throttling so concurrent fetches stay within each exchange's quota
+       self.limiters = {exchange: _AdaptiveRateLimiter(rate) for exchange, rate in _EXCHANGE_RATE_LIMITS.items()}
+
+   async def __aenter__(self):
+       # One pooled client for every exchange: keep-alive sockets are reused per host,
+       # and the shared headers are sent with every request
+       self.http = aiohttp.ClientSession(
+           connector=aiohttp.TCPConnector(limit=20, limit_per_host=8, keepalive_timeout=30),
+           headers=_HEADERS,
+           auto_decompress=True
+       )
+       return self
+
+   async def __aexit__(self, exc_type, exc, tb):
+       await self.http.close()
+       self.http = None
+       if self._sender is not None:
+           self._sender.close()
+           self._sender = None
+
+   @asynccontextmanager
+   async def _get(self, exchange: str, url: str, timeout: float = 10,
+                  retries: int = _RETRY_TOTAL, **kwargs):
+       """
+       GET from an exchange through its rate limiter, retrying rate limits, 5xx and
+       connection errors with exponential backoff plus jitter (honouring Retry-After when present)
+
+       ``retries=0`` makes a single attempt.
+       """
+       limiter = self.limiters[exchange]
+       for attempt in range(retries + 1):
+           last_attempt = attempt == retries
+           await limiter.acquire()
+           try:
+               response = await self.http.get(url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs)
+           except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+               if last_attempt:
+                   raise
+               await asyncio.sleep(self._backoff_delay(attempt))
+               continue
+
+           if response.status == 429:
+               limiter.on_throttled()
+           else:
+               limiter.on_success()
+
+           if response.status in _RETRY_STATUSES and not last_attempt:
+               retry_after = response.headers.get('Retry-After', '')
+               response.release()
+               delay = float(retry_after) if retry_after.isdigit() else self._backoff_delay(attempt)
+               await asyncio.sleep(delay)
+               continue
+
+           try:
+               yield response
+           finally:
+               response.release()
+           return
+
+   @staticmethod
+   def _backoff_delay(attempt: int) -> float:
+       """
+       Delay before retry number ``attempt`` (0-based): 1s, 2s, 4s... plus random jitter
+       """
+       return _RETRY_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, _RETRY_BACKOFF_JITTER)
 
    def create_crypto_table(self) -> bool:
        """
        Create the crypto_prices table with optimized schema for time-series data
        """
+       if self._table_ready:
+           return True
+
        create_table_sql = """
        CREATE TABLE IF NOT EXISTS crypto_prices (
            timestamp TIMESTAMP,
@@ -43,154 +256,187 @@ class QuestDBCryptoIngestion:
            )
            response.raise_for_status()
            logger.info("✅ Crypto prices table created successfully")
+           self._table_ready = True
            return True
        except Exception as e:
-           logger.error(f"❌ Failed to create table: {e}")
+           logger.error("❌ Failed to create table: %s", e)
            return False
 
-   def fetch_binance_data(self, symbols: List[str]) -> List[Dict]:
+   async def fetch_binance_data(self, symbols: List[str], fields: Optional[Set[str]] = None) -> List[Dict]:
        """
        Fetch real-time crypto data from Binance API with error handling
-       """
-       binance_data = []
 
-       # Add headers to avoid blocking
-       headers = {
-           'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-       }
+       ``fields`` limits which record fields are actually fetched (price is always
+       fetched); defaults to all of them. Unrequested fields are left at 0.
+       """
+       if not self._binance_probed:
+           await self._probe_binance()
+       if self._binance_blocked:
+           return []
 
-       for symbol in symbols:
-           try:
-               # Try simple price endpoint first (less likely to be blocked)
-               simple_url = "https://api.binance.com/api/v3/ticker/price"
-               response = requests.get(
-                   simple_url,
-                   params={"symbol": f"{symbol}USDT"},
-                   headers=headers,
-                   timeout=10
-               )
+       fields = _BINANCE_FIELDS if fields is None else set(fields)
+       # One timestamp (epoch nanoseconds) for the whole fetch cycle
+       timestamp = time.time_ns()
 
-               if response.status_code == 451:
-                   logger.warning(f"⚠️  Binance API blocked (451 error) for {symbol}. Skipping Binance.")
-                   break  # Skip all Binance requests if blocked
+       # Fetch all symbols concurrently
+       records = await asyncio.gather(*(self._fetch_one_binance(symbol, timestamp, fields) for symbol in symbols))
+       return [record for record in records if record]
 
-               response.raise_for_status()
-               price_data = response.json()
+   async def _probe_binance(self):
+       """
+       One cheap /ping up front, so a geo-block costs one request instead of one per symbol
+       """
+       self._binance_probed = True
+       try:
+           async with self._get('binance', _BINANCE_PING_URL, timeout=2, retries=0) as response:
+               if response.status == 451:
+                   self._mark_binance_blocked()
+       except Exception:
+           # Inconclusive; the real requests will report their own errors
+           pass
+
+   def _mark_binance_blocked(self):
+       """
+       Remember the geo-block and explain it once
+       """
+       if self._binance_blocked:
+           return
+       self._binance_blocked = True
+       logger.warning("⚠️  Binance API access restricted (error 451). This is common due to geographical restrictions. Skipping Binance.")
+       logger.info("💡 Tip: Try using a VPN or rely on other exchanges like Coinbase")
 
-               # Try to get additional data, but fall back to basic if needed
-               try:
-                   # Get 24hr ticker statistics
-                   ticker_url = "https://api.binance.com/api/v3/ticker/24hr"
-                   ticker_response = requests.get(ticker_url, params={"symbol": f"{symbol}USDT"}, headers=headers, timeout=10)
-                   ticker_data = ticker_response.json() if ticker_response.status_code == 200 else {}
+   async def _fetch_one_binance(self, symbol: str, timestamp: int, fields: Set[str]) -> Optional[Dict]:
+       """
+       Fetch a single symbol from Binance; returns None if it could not be fetched
+       """
+       pair = symbol + 'USDT'
+       try:
+           # Price, 24hr statistics and top of book are independent: request them together.
+           # Extras the caller did not ask for are skipped and come back empty.
+           price_data, ticker_data, depth_data = await asyncio.gather(
+               self._fetch_binance_price(pair),
+               self._fetch_binance_extra(_BINANCE_TICKER_URL, {"symbol": pair}, 'volume' in fields),
+               self._fetch_binance_extra(
+                   _BINANCE_DEPTH_URL,
+                   {"symbol": pair, "limit": 5},
+                   bool(fields & _BINANCE_DEPTH_FIELDS)
+               )
+           )
+           if price_data is None:
+               return None
 
-                   # Get order book for bid/ask (optional)
-                   depth_url = "https://api.binance.com/api/v3/depth"
-                   depth_response = requests.get(depth_url, params={"symbol": f"{symbol}USDT", "limit": 5}, headers=headers, timeout=10)
-                   depth_data = depth_response.json() if depth_response.status_code == 200 else {}
+           try:
+               bid = float(depth_data['bids'][0][0]) if depth_data.get('bids') else 0
+               ask = float(depth_data['asks'][0][0]) if depth_data.get('asks') else 0
+               volume = float(ticker_data.get('volume', 0))
+           except Exception:
+               # Fall back to basic data
+               bid = ask = volume = 0
+
+           crypto_record = {
+               'timestamp': timestamp,  # epoch nanoseconds
+               'symbol': symbol,
+               'exchange': 'binance',
+               'price': float(price_data['price']),
+               'volume': volume,
+               'bid': bid,
+               'ask': ask,
+               'spread': ask - bid if ask > 0 and bid > 0 else 0,
+               'market_cap': 0
+           }
 
-                   bid = float(depth_data['bids'][0][0]) if depth_data.get('bids') else 0
-                   ask = float(depth_data['asks'][0][0]) if depth_data.get('asks') else 0
-                   volume = float(ticker_data.get('volume', 0))
+           logger.debug("📊 Fetched %s data from Binance: $%.2f", symbol, crypto_record['price'])
+           return crypto_record
 
-               except:
-                   # Fall back to basic data
-                   bid = ask = volume = 0
+       except aiohttp.ClientResponseError as e:
+           if e.status == 451:
+               self._mark_binance_blocked()
+           else:
+               logger.error("❌ HTTP error fetching %s from Binance: %s", symbol, e)
+       except Exception as e:
+           logger.error("❌ Failed to fetch %s from Binance: %s", symbol, e)
 
-               crypto_record = {
-                   'timestamp': datetime.utcnow().isoformat() + 'Z',
-                   'symbol': symbol,
-                   'exchange': 'binance',
-                   'price': float(price_data['price']),
-                   'volume': volume,
-                   'bid': bid,
-                   'ask': ask,
-                   'spread': ask - bid if ask > 0 and bid > 0 else 0,
-                   'market_cap': 0
-               }
+       return None
 
-               binance_data.append(crypto_record)
-               logger.info(f"📊 Fetched {symbol} data from Binance: ${crypto_record['price']:.2f}")
+   async def _fetch_binance_price(self, pair: str) -> Optional[Dict]:
+       """
+       Fetch the spot price (simple endpoint, least likely to be blocked); None if geo-blocked
+       """
+       async with self._get('binance', _BINANCE_PRICE_URL, params={"symbol": pair}) as response:
+           if response.status == 451:
+               self._mark_binance_blocked()
+               return None
 
-           except requests.exceptions.HTTPError as e:
-               if e.response.status_code == 451:
-                   logger.warning(f"⚠️  Binance API access restricted (error 451). This is common due to geographical restrictions.")
-                   logger.info(f"💡 Tip: Try using a VPN or rely on other exchanges like Coinbase")
-                   break  # Skip remaining Binance requests
-               else:
-                   logger.error(f"❌ HTTP error fetching {symbol} from Binance: {e}")
-           except Exception as e:
-               logger.error(f"❌ Failed to fetch {symbol} from Binance: {e}")
+           response.raise_for_status()
+           return orjson.loads(await response.read())
 
-       return binance_data
+   async def _fetch_binance_extra(self, url: str, params: Dict, wanted: bool) -> Dict:
+       """
+       Fetch an optional Binance endpoint; empty if not wanted or unavailable
+       """
+       if not wanted:
+           return {}
+       try:
+           async with self._get('binance', url, params=params) as response:
+               return orjson.loads(await response.read()) if response.status == 200 else {}
+       except Exception:
+           return {}
 
-   def fetch_coinbase_data(self, symbols: List[str]) -> List[Dict]:
+   async def fetch_coinbase_data(self, symbols: List[str]) -> List[Dict]:
        """
        Fetch real-time crypto data from Coinbase Pro API
        """
-       coinbase_data = []
+       timestamp = time.time_ns()
 
-       headers = {
-           'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-       }
+       records = await asyncio.gather(*(self._fetch_one_coinbase(symbol, timestamp) for symbol in symbols))
+       return [record for record in records if record]
 
-       for symbol in symbols:
-           try:
-               # Get ticker data
-               ticker_url = f"https://api.exchange.coinbase.com/products/{symbol}-USD/ticker"
-               response = requests.get(ticker_url, headers=headers, timeout=10)
+   async def _fetch_one_coinbase(self, symbol: str, timestamp: int) -> Optional[Dict]:
+       """
+       Fetch a single symbol from Coinbase; returns None if it could not be fetched
+       """
+       try:
+           # Get ticker data
+           async with self._get('coinbase', _COINBASE_TICKER_URL.format(symbol)) as response:
                response.raise_for_status()
 
-               data = response.json()
-
-               crypto_record = {
-                   'timestamp': datetime.utcnow().isoformat() + 'Z',
-                   'symbol': symbol,
-                   'exchange': 'coinbase',
-                   'price': float(data['price']),
-                   'volume': float(data['volume']),
-                   'bid': float(data['bid']),
-                   'ask': float(data['ask']),
-                   'spread': float(data['ask']) - float(data['bid']),
-                   'market_cap': 0
-               }
+               data = orjson.loads(await response.read())
+
+           crypto_record = {
+               'timestamp': timestamp,  # epoch nanoseconds
+               'symbol': symbol,
+               'exchange': 'coinbase',
+               'price': float(data['price']),
+               'volume': float(data['volume']),
+               'bid': float(data['bid']),
+               'ask': float(data['ask']),
+               'spread': float(data['ask']) - float(data['bid']),
+               'market_cap': 0
+           }
 
-               coinbase_data.append(crypto_record)
-               logger.info(f"📊 Fetched {symbol} data from Coinbase: ${crypto_record['price']:.2f}")
+           logger.debug("📊 Fetched %s data from Coinbase: $%.2f", symbol, crypto_record['price'])
+           return crypto_record
 
-           except Exception as e:
-               logger.error(f"❌ Failed to fetch {symbol} from Coinbase: {e}")
+       except Exception as e:
+           logger.error("❌ Failed to fetch %s from Coinbase: %s", symbol, e)
 
-       return coinbase_data
+       return None
 
-   def fetch_coingecko_data(self, symbols: List[str]) -> List[Dict]:
+   async def fetch_coingecko_data(self, symbols: List[str]) -> List[Dict]:
        """
        Fetch crypto data from CoinGecko API (more reliable, no geo-restrictions)
        """
        coingecko_data = []
 
-       # Symbol mapping for CoinGecko
-       symbol_map = {
-           'BTC': 'bitcoin',
-           'ETH': 'ethereum',
-           'ADA': 'cardano',
-           'SOL': 'solana'
-       }
-
-       headers = {
-           'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-       }
-
        try:
            # Get multiple coins in one request
-           coin_ids = [symbol_map.get(symbol, symbol.lower()) for symbol in symbols if symbol in symbol_map]
+           coin_ids = [_COINGECKO_IDS[symbol] for symbol in symbols if symbol in _COINGECKO_IDS]
 
            if not coin_ids:
                logger.warning("⚠️  No valid symbols for CoinGecko")
                return coingecko_data
 
            coins_param = ','.join(coin_ids)
-           url = "https://api.coingecko.com/api/v3/simple/price"
            params = {
                'ids': coins_param,
                'vs_currencies': 'usd',
@@ -199,13 +445,20 @@ class QuestDBCryptoIngestion:
                'include_market_cap': 'true'
            }
 
-           response = requests.get(url, params=params, headers=headers, timeout=15)
-           response.raise_for_status()
+           cached = self._coingecko_cache.get(coins_param)
+           if cached and time.monotonic() - cached[0] < _COINGECKO_CACHE_TTL:
+               data = cached[1]
+           else:
+               async with self._get('coingecko', _COINGECKO_PRICE_URL, params=params, timeout=15) as response:
+                   response.raise_for_status()
+
+                   data = orjson.loads(await response.read())
+               self._coingecko_cache[coins_param] = (time.monotonic(), data)
 
-           data = response.json()
+           timestamp = time.time_ns()
 
            for symbol in symbols:
-               coin_id = symbol_map.get(symbol)
+               coin_id = _COINGECKO_IDS.get(symbol)
                if coin_id and coin_id in data:
                    coin_data = data[coin_id]
 
@@ -214,7 +467,7 @@ class QuestDBCryptoIngestion:
                    spread = price * 0.001  # Assume 0.1% spread
 
                    crypto_record = {
-                       'timestamp': datetime.utcnow().isoformat() + 'Z',
+                       'timestamp': timestamp,  # epoch nanoseconds
                        'symbol': symbol,
                        'exchange': 'coingecko',
                        'price': price,
@@ -226,116 +479,116 @@ class QuestDBCryptoIngestion:
                    }
 
                    coingecko_data.append(crypto_record)
-                   logger.info(f"📊 Fetched {symbol} data from CoinGecko: ${crypto_record['price']:.2f}")
+                   logger.debug("📊 Fetched %s data from CoinGecko: $%.2f", symbol, crypto_record['price'])
 
        except Exception as e:
-           logger.error(f"❌ Failed to fetch data from CoinGecko: {e}")
+           logger.error("❌ Failed to fetch data from CoinGecko: %s", e)
 
        return coingecko_data
 
-   def fetch_kraken_data(self, symbols: List[str]) -> List[Dict]:
+   async def fetch_kraken_data(self, symbols: List[str]) -> List[Dict]:
        """
        Fetch crypto data from Kraken API (another reliable alternative)
        """
-       kraken_data = []
-
-       # Symbol mapping for Kraken
-       symbol_map = {
-           'BTC': 'XXBTZUSD',
-           'ETH': 'XETHZUSD',
-           'ADA': 'ADAUSD',
-           'SOL': 'SOLUSD'
-       }
-
-       headers = {
-           'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-       }
-
-       for symbol in symbols:
-           if symbol not in symbol_map:
-               continue
+       timestamp = time.time_ns()
 
-           try:
-               kraken_symbol = symbol_map[symbol]
-               url = "https://api.kraken.com/0/public/Ticker"
-               params = {'pair': kraken_symbol}
+       records = await asyncio.gather(*(
+           self._fetch_one_kraken(symbol, _KRAKEN_PAIRS[symbol], timestamp)
+           for symbol in symbols if symbol in _KRAKEN_PAIRS
+       ))
+       return [record for record in records if record]
 
-               response = requests.get(url, params=params, headers=headers, timeout=10)
+   async def _fetch_one_kraken(self, symbol: str, kraken_symbol: str, timestamp: int) -> Optional[Dict]:
+       """
+       Fetch a single symbol from Kraken; returns None if it could not be fetched
+       """
+       try:
+           async with self._get('kraken', _KRAKEN_TICKER_URL, params={'pair': kraken_symbol}) as response:
                response.raise_for_status()
 
-               data = response.json()
+               data = orjson.loads(await response.read())
 
-               if data.get('error'):
-                   logger.error(f"❌ Kraken API error for {symbol}: {data['error']}")
-                   continue
+           if data.get('error'):
+               logger.error("❌ Kraken API error for %s: %s", symbol, data['error'])
+               return None
 
-               if 'result' in data and kraken_symbol in data['result']:
-                   ticker = data['result'][kraken_symbol]
+           if 'result' in data and kraken_symbol in data['result']:
+               ticker = data['result'][kraken_symbol]
 
-                   crypto_record = {
-                       'timestamp': datetime.utcnow().isoformat() + 'Z',
-                       'symbol': symbol,
-                       'exchange': 'kraken',
-                       'price': float(ticker['c'][0]),  # Last trade closed
-                       'volume': float(ticker['v'][1]),  # Volume last 24 hours
-                       'bid': float(ticker['b'][0]),  # Best bid price
-                       'ask': float(ticker['a'][0]),  # Best ask price
-                       'spread': float(ticker['a'][0]) - float(ticker['b'][0]),
-                       'market_cap': 0
-                   }
+               crypto_record = {
+                   'timestamp': timestamp,  # epoch nanoseconds
+                   'symbol': symbol,
+                   'exchange': 'kraken',
+                   'price': float(ticker['c'][0]),  # Last trade closed
+                   'volume': float(ticker['v'][1]),  # Volume last 24 hours
+                   'bid': float(ticker['b'][0]),  # Best bid price
+                   'ask': float(ticker['a'][0]),  # Best ask price
+                   'spread': float(ticker['a'][0]) - float(ticker['b'][0]),
+                   'market_cap': 0
+               }
 
-                   kraken_data.append(crypto_record)
-                   logger.info(f"📊 Fetched {symbol} data from Kraken: ${crypto_record['price']:.2f}")
+               logger.debug("📊 Fetched %s data from Kraken: $%.2f", symbol, crypto_record['price'])
+               return crypto_record
 
-           except Exception as e:
-               logger.error(f"❌ Failed to fetch {symbol} from Kraken: {e}")
+       except Exception as e:
+           logger.error("❌ Failed to fetch %s from Kraken: %s", symbol, e)
 
-       return kraken_data
+       return None
+
+   def _ilp_sender(self) -> Sender:
+       """
+       The instance's ILP sender, connected on first use so every batch reuses
+       the same keep-alive connection to QuestDB
+       """
+       if self._sender is None:
+           sender = Sender.from_conf(self.ilp_conf)
+           sender.establish()
+           self._sender = sender
+       return self._sender
 
    def ingest_crypto_data(self, crypto_data: List[Dict]) -> bool:
        """
-       Ingest crypto data into QuestDB using REST API /exec endpoint
+       Ingest crypto data into QuestDB using the InfluxDB Line Protocol (ILP) over HTTP
        """
        if not crypto_data:
            logger.warning("⚠️  No crypto data to ingest")
            return False
 
-       # Build INSERT query
-       values_list = []
-       for record in crypto_data:
-           values = (
-               f"'{record['timestamp']}',"
-               f"'{record['symbol']}',"
-               f"'{record['exchange']}',"
-               f"{record['price']},"
-               f"{record['volume']},"
-               f"{record['bid']},"
-               f"{record['ask']},"
-               f"{record['spread']},"
-               f"{record['market_cap']}"
-           )
-           values_list.append(f"({values})")
+       try:
+           # Columnar batch: symbols dictionary-encoded, prices as contiguous float64
+           df = pd.DataFrame.from_records(crypto_data, columns=_ROW_COLUMNS)
+           df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ns')
+           df['symbol'] = df['symbol'].astype('category')
+           df['exchange'] = df['exchange'].astype('category')
+           # Cast explicitly: ILP would send integer 0s as LONG, not DOUBLE
+           df[_DOUBLE_COLUMNS] = df[_DOUBLE_COLUMNS].astype('float64')
+
+           # Rows stream straight to the WAL writer, bypassing the SQL parser. Bounded
+           # chunks keep request size flat; a failed chunk doesn't sink the others.
+           failed_rows = 0
+           sender = self._ilp_sender()
+           for start in range(0, len(df), _INGEST_CHUNK_ROWS):
+               chunk = df.iloc[start:start + _INGEST_CHUNK_ROWS]
+               # Fresh buffer per chunk, so rows from a failed flush can't leak into the next
+               buffer = sender.new_buffer()
+               buffer.dataframe(chunk, table_name='crypto_prices', symbols=['symbol', 'exchange'], at='timestamp')
+               try:
+                   sender.flush(buffer)
+               except Exception as e:
+                   failed_rows += len(chunk)
+                   logger.error("❌ Failed to ingest rows %d-%d: %s", start, start + len(chunk) - 1, e)
 
-       insert_sql = f"""
-       INSERT INTO crypto_prices
-       (timestamp, symbol, exchange, price, volume, bid, ask, spread, market_cap)
-       VALUES {','.join(values_list)}
-       """
+           if failed_rows:
+               logger.warning("⚠️  Ingested %d of %d crypto records", len(crypto_data) - failed_rows, len(crypto_data))
+               return False
 
-       try:
-           response = self.session.get(
-               f"{self.questdb_url}/exec",
-               params={"query": insert_sql}
-           )
-           response.raise_for_status()
-           logger.info(f"✅ Successfully ingested {len(crypto_data)} crypto records")
+           logger.info("✅ Successfully ingested %d crypto records", len(crypto_data))
            return True
        except Exception as e:
-           logger.error(f"❌ Failed to ingest data: {e}")
-           logger.error(f"Query: {insert_sql[:200]}...")
+           logger.error("❌ Failed to ingest data: %s", e)
            return False
 
-def demonstrate_crypto_pipeline():
+async def demonstrate_crypto_pipeline():
    """
    Main demonstration function showing the complete crypto data pipeline
    """
@@ -343,60 +596,66 @@ def demonstrate_crypto_pipeline():
    print("=" * 60)
 
    # Initialize components
-   ingestion = QuestDBCryptoIngestion()
-
-   # Step 1: Create table schema
-   print("\n📋 Step 1: Creating crypto_prices table...")
-   if not ingestion.create_crypto_table():
-       print("❌ Failed to create table. Make sure QuestDB is running on localhost:9000")
-       return
-
-   # Step 2: Fetch and ingest crypto data from multiple sources
-   print("\n📊 Step 2: Fetching crypto data from multiple exchanges...")
-   symbols = ["BTC", "ETH", "ADA", "SOL"]
-
-   all_crypto_data = []
-
-   # Try multiple data sources (more reliable)
-   print("\n🔄 Trying Binance API...")
-   binance_data = ingestion.fetch_binance_data(symbols)
-   all_crypto_data.extend(binance_data)
-
-   print("\n🔄 Trying Coinbase API...")
-   coinbase_data = ingestion.fetch_coinbase_data(symbols)
-   all_crypto_data.extend(coinbase_data)
-
-   print("\n🔄 Trying CoinGecko API...")
-   coingecko_data = ingestion.fetch_coingecko_data(symbols)
-   all_crypto_data.extend(coingecko_data)
-
-   print("\n🔄 Trying Kraken API...")
-   kraken_data = ingestion.fetch_kraken_data(symbols)
-   all_crypto_data.extend(kraken_data)
-
-   # Summary of data collection
-   print(f"\n📈 Data Collection Summary:")
-   print(f"   • Binance: {len(binance_data)} records")
-   print(f"   • Coinbase: {len(coinbase_data)} records")
-   print(f"   • CoinGecko: {len(coingecko_data)} records")
-   print(f"   • Kraken: {len(kraken_data)} records")
-   print(f"   • Total: {len(all_crypto_data)} records")
-
-   # Ingest the data
-   if all_crypto_data:
-       print(f"\n💾 Ingesting {len(all_crypto_data)} records into QuestDB...")
-       ingestion.ingest_crypto_data(all_crypto_data)
-   else:
-       print("⚠️  No crypto data fetched from any source.")
-       print("💡 This might be due to:")
-       print("   - Network connectivity issues")
-       print("   - API rate limiting or geographical restrictions")
-       print("   - Temporary API downtime")
-       print("\n🔧 Troubleshooting tips:")
-       print("   - Try using a VPN if you're getting 451 errors")
-       print("   - Check your internet connection")
-       print("   - Wait a few minutes and try again")
-       return
+   async with QuestDBCryptoIngestion() as ingestion:
+       # Step 1: Create table schema
+       print("\n📋 Step 1: Creating crypto_prices table...")
+       if not ingestion.create_crypto_table():
+           print("❌ Failed to create table. Make sure QuestDB is running on localhost:9000")
+           return
+
+       # Step 2: Fetch and ingest crypto data from multiple sources
+       print("\n📊 Step 2: Fetching crypto data from multiple exchanges...")
+       symbols = ["BTC", "ETH", "ADA", "SOL"]
+
+       all_crypto_data = []
+
+       # Try multiple data sources (more reliable), all at once
+       print("\n🔄 Trying Binance, Coinbase, CoinGecko and Kraken APIs concurrently...")
+       # CoinGecko's single batched call overlaps with the per-symbol exchanges; one
+       # provider failing must not discard what the others returned
+       exchanges = ["Binance", "Coinbase", "CoinGecko", "Kraken"]
+       results = await asyncio.gather(
+           ingestion.fetch_binance_data(symbols),
+           ingestion.fetch_coinbase_data(symbols),
+           ingestion.fetch_coingecko_data(symbols),
+           ingestion.fetch_kraken_data(symbols),
+           return_exceptions=True
+       )
+
+       for exchange, result in zip(exchanges, results):
+           if isinstance(result, Exception):
+               logger.error("❌ Fetching from %s failed: %s", exchange, result)
+       binance_data, coinbase_data, coingecko_data, kraken_data = (
+           [] if isinstance(result, Exception) else result for result in results
+       )
+       all_crypto_data.extend(binance_data)
+       all_crypto_data.extend(coinbase_data)
+       all_crypto_data.extend(coingecko_data)
+       all_crypto_data.extend(kraken_data)
+
+       # Summary of data collection
+       print(f"\n📈 Data Collection Summary:")
+       print(f"   • Binance: {len(binance_data)} records")
+       print(f"   • Coinbase: {len(coinbase_data)} records")
+       print(f"   • CoinGecko: {len(coingecko_data)} records")
+       print(f"   • Kraken: {len(kraken_data)} records")
+       print(f"   • Total: {len(all_crypto_data)} records")
+
+       # Ingest the data
+       if all_crypto_data:
+           print(f"\n💾 Ingesting {len(all_crypto_data)} records into QuestDB...")
+           ingestion.ingest_crypto_data(all_crypto_data)
+       else:
+           print("⚠️  No crypto data fetched from any source.")
+           print("💡 This might be due to:")
+           print("   - Network connectivity issues")
+           print("   - API rate limiting or geographical restrictions")
+           print("   - Temporary API downtime")
+           print("\n🔧 Troubleshooting tips:")
+           print("   - Try using a VPN if you're getting 451 errors")
+           print("   - Check your internet connection")
+           print("   - Wait a few minutes and try again")
+           return
 
 if __name__ == "__main__":
-   demonstrate_crypto_pipeline()
+   asyncio.run(demonstrate_crypto_pipeline())